@@ -1,13 +1,15 @@
 """This script is supposed to help find the best word to start with."""
 
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional
 
 import matplotlib.pyplot as plt
 import pandas as pd
 import seaborn as sns
 from tqdm import tqdm
 
+from .kernels import get_mp_context
 from .wordle import (
     CachedGreedyInitialGuesser,
     Configuration,
@@ -18,6 +20,35 @@ HERE = Path(__file__).parent.resolve()
 ROOT = HERE.parent.parent.resolve()
 RESULTS = ROOT.joinpath("results")
 
+#: The configuration shared by each worker process, set by :func:`_initialize_worker`
+_configuration: Optional[Configuration] = None
+
+
+def _initialize_worker(configuration: Configuration) -> None:
+    global _configuration
+    configuration.seed()
+    _configuration = configuration
+
+
+def _evaluate(candidate: tuple[tuple[str, ...], float]) -> tuple[Any, ...]:
+    """Play all words with the given initial guesses in a worker process."""
+    configuration = _configuration
+    if configuration is None:
+        raise RuntimeError("worker was not initialized")
+    words, score = candidate
+    controller = Controller(
+        player_cls=CachedGreedyInitialGuesser,
+        player_kwargs={"initial": words},
+        configuration=configuration,
+    )
+    histogram = controller.play_all(use_tqdm=False)
+    return (
+        *words,
+        score,
+        configuration.success(histogram),
+        configuration.speed(histogram),
+    )
+
 
 def main(
     k: int = 1,
@@ -25,8 +56,13 @@ def main(
     length: Optional[int] = None,
     height: Optional[int] = None,
     language: Optional[str] = None,
+    max_workers: Optional[int] = None,
 ):
-    """Run the best word search."""
+    """Run the best word search.
+
+    :param max_workers: The number of processes used to evaluate the top words.
+        Defaults to the number of processors.
+    """
     configuration = Configuration(length=length, height=height, language=language)
 
     rows = []
@@ -42,28 +78,23 @@ def main(
     else:
         unit = f"{k}-tuple"
 
-    it = tqdm(
-        configuration.get_top_words(k=k, n=n),
-        unit_scale=True,
-        unit=unit,
-        desc=f"{k=},{n=},l-{configuration.length},h={configuration.height}",
-    )
-    for words, score in it:
-        it.set_postfix(words=",".join(words), score=score)
-        controller = Controller(
-            player_cls=CachedGreedyInitialGuesser,
-            player_kwargs={"initial": words},
-            configuration=configuration,
-        )
-        counter = controller.play_all()
-        rows.append(
-            (
-                *words,
-                score,
-                configuration.success(counter),
-                configuration.speed(counter),
-            )
+    candidates = configuration.get_top_words(k=k, n=n)
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        mp_context=get_mp_context(),
+        initializer=_initialize_worker,
+        initargs=(configuration,),
+    ) as executor:
+        it = tqdm(
+            executor.map(_evaluate, candidates),
+            total=len(candidates),
+            unit_scale=True,
+            unit=unit,
+            desc=f"{k=},{n=},l-{configuration.length},h={configuration.height}",
         )
+        for row in it:
+            it.set_postfix(words=",".join(row[:k]), score=row[k])
+            rows.append(row)
 
     if n is None:
         stem_str = (
@@ -0,0 +1,221 @@
+"""Compiled kernels for the hot loops, available when :mod:`numba` is installed.
+
+Install with ``pip install pyrdle[numba]``. Callers should check
+:data:`HAS_NUMBA` and fall back to the pure Python/NumPy implementations
+otherwise, since the kernels are far slower than those when not compiled.
+"""
+
+import multiprocessing
+from multiprocessing.context import BaseContext
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:  # pragma: no cover
+    HAS_NUMBA = False
+    prange = range  # type: ignore[misc]
+
+    def njit(*args, **kwargs):  # type: ignore
+        """Return the function unchanged, in place of :func:`numba.njit`."""
+
+        def _decorator(func):
+            return func
+
+        return _decorator
+
+else:
+    HAS_NUMBA = True
+
+__all__ = [
+    "HAS_NUMBA",
+    "get_mp_context",
+    "calculate_responses",
+    "enumerate_k_tuples",
+    "first_valid",
+]
+
+
+def get_mp_context() -> BaseContext:
+    """Get the context for starting worker processes after kernels may have run.
+
+    A process that forks after running a parallel kernel with numba's TBB
+    threading layer can hang when it exits, so workers are started from a fresh
+    server process (or spawned, where that's not available) instead of forked.
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context("spawn")
+
+
+@njit(cache=True)
+def _popcount(mask):
+    """Count the number of set bits in an unsigned integer."""
+    count = 0
+    while mask:
+        mask &= mask - np.uint64(1)
+        count += 1
+    return count
+
+
+@njit(cache=True, parallel=True)
+def enumerate_k_tuples(masks, k, length):
+    """Get all k-tuples of words with no overlapping letters.
+
+    :param masks: An array of letter masks of words without repeated letters
+    :param k: Number of words in the sequence
+    :param length: The number of letters in each word
+    :returns: An array of shape (M, k) of the indices of the masks in each tuple
+
+    The search is split over the first word of each tuple, in parallel. Each
+    first word's tuples are counted in a first pass so they can be written into
+    their own slice of the output in a second pass.
+    """
+    n = len(masks)
+    counts = np.zeros(n, dtype=np.int64)
+    empty = np.empty((0, k), dtype=np.int32)
+    for root in prange(n):
+        counts[root] = _search(masks, k, length, root, empty, 0)
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    out = np.empty((offsets[n], k), dtype=np.int32)
+    for root in prange(n):
+        _search(masks, k, length, root, out, offsets[root])
+    return out
+
+
+@njit(cache=True)
+def _search(masks, k, length, root, out, offset):
+    """Search for all k-tuples of words with no overlapping letters starting with the root.
+
+    :param masks: An array of letter masks of words without repeated letters
+    :param k: Number of words in the sequence
+    :param length: The number of letters in each word
+    :param root: The index of the first word in each tuple. All other words
+        in the tuple have larger indices.
+    :param out: An array of shape (M, k) into which the indices of the masks
+        of each tuple are written, starting at the offset. If M is zero, the
+        tuples are only counted.
+    :param offset: The first row of the output to write to
+    :returns: The number of tuples
+
+    This is an iterative version of the search generated by
+    :func:`pyrdle.lang._compile_search` that keeps the candidates for each
+    depth of the search in a preallocated stack.
+    """
+    n = len(masks)
+    candidates = np.empty((k, n - root), dtype=np.int64)
+    counts = np.zeros(k, dtype=np.int64)
+    positions = np.zeros(k, dtype=np.int64)
+    chosen = np.empty(k, dtype=np.int64)
+    candidates[0, 0] = root
+    counts[0] = 1
+    write = len(out) > 0
+    total = 0
+    depth = 0
+    while depth >= 0:
+        position = positions[depth]
+        if position >= counts[depth]:
+            depth -= 1
+            continue
+        positions[depth] = position + 1
+        word = candidates[depth, position]
+        chosen[depth] = word
+        if depth == k - 1:
+            if write:
+                out[offset + total] = chosen
+            total += 1
+            continue
+        mask = masks[word]
+        union = np.uint64(0)
+        count = 0
+        start = root + 1 if depth == 0 else position + 1
+        for j in range(start, n if depth == 0 else counts[depth]):
+            other = j if depth == 0 else candidates[depth, j]
+            if (masks[other] & mask) == 0:
+                candidates[depth + 1, count] = other
+                union |= masks[other]
+                count += 1
+        # Prune if the candidates can't possibly cover enough new letters
+        remaining = k - depth - 1
+        if count < remaining or _popcount(union) < remaining * length:
+            continue
+        counts[depth + 1] = count
+        positions[depth + 1] = 0
+        depth += 1
+    return total
+
+
+@njit(cache=True)
+def first_valid(words_array, masks, guessed, position_indices, position_codes, appears, no_appears):
+    """Get the index of the first word valid under the constraints.
+
+    :param words_array: An array of shape (N, length) of the codes of the letters of each word
+    :param masks: An array of the letter masks of each word
+    :param guessed: An array of the indices of the words that were already guessed
+    :param position_indices: An array of the positions whose letters are known
+    :param position_codes: An array of the codes of the letters at the known positions
+    :param appears: A letter mask of the letters that must appear
+    :param no_appears: A letter mask of the letters that must not appear
+    :returns: The index of the first valid word, or -1 if there are none
+
+    Unlike :func:`pyrdle.wordle.get_valid_indices`, all constraints are checked
+    for each word in a single pass that stops at the first valid word, so it
+    isn't split up in parallel.
+    """
+    for i in range(len(masks)):
+        if (masks[i] & appears) != appears or (masks[i] & no_appears) != 0:
+            continue
+        valid = True
+        for j in range(len(position_indices)):
+            if words_array[i, position_indices[j]] != position_codes[j]:
+                valid = False
+                break
+        if not valid:
+            continue
+        for j in range(len(guessed)):
+            if guessed[j] == i:
+                valid = False
+                break
+        if valid:
+            return i
+    return -1
+
+
+@njit(cache=True, parallel=True)
+def calculate_responses(words_array, n_letters, correct, somewhere, out):
+    """Calculate the encoded calls for every guess against every secret word.
+
+    :param words_array: An array of shape (N, length) of the codes of the letters of each word
+    :param n_letters: The number of letters in the alphabet
+    :param correct: The code of the call for a letter in the right position
+    :param somewhere: The code of the call for a letter that appears elsewhere.
+        The code of the call for a letter that doesn't appear must be zero.
+    :param out: An array of shape (N, N) into which the calls for guessing the
+        i-th word when the j-th is the secret are written in the i-th row and j-th
+        column, encoded as base-3 digits like :func:`pyrdle.wordle.encode_calls`
+
+    The guesses are split up in parallel. Each keeps a count of the copies of
+    each letter in the secret word that haven't been called yet, so repeated
+    letters are called like :func:`pyrdle.wordle.Configuration.get_calls`.
+    """
+    n, length = words_array.shape
+    for guess in prange(n):
+        remaining = np.zeros(n_letters, dtype=np.int64)
+        for secret in range(n):
+            for i in range(length):
+                if words_array[guess, i] != words_array[secret, i]:
+                    remaining[words_array[secret, i]] += 1
+            code = 0
+            weight = 1
+            for i in range(length):
+                letter = words_array[guess, i]
+                if letter == words_array[secret, i]:
+                    code += correct * weight
+                elif remaining[letter] > 0:
+                    code += somewhere * weight
+                    remaining[letter] -= 1
+                weight *= 3
+            for i in range(length):
+                remaining[words_array[secret, i]] = 0
+            out[guess, secret] = code
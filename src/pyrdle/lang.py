@@ -1,44 +1,132 @@
 """Deeper support for alternate languages and subsets."""
 
+import functools
+import heapq
 import itertools as itt
 import math
+import operator
+import os
 import random
+import tempfile
 import zipfile
 from collections import Counter, defaultdict
 from functools import lru_cache
-from typing import Iterable, Optional
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, NamedTuple, Optional, Sequence
 
+import numpy as np
 import pystow
 from tqdm import tqdm
 
+from .kernels import HAS_NUMBA, enumerate_k_tuples
+
 __all__ = [
     "get_words",
+    "get_sorted_words",
     "Language",
+    "Index",
 ]
 
 URL = "http://www.ids-mannheim.de/fileadmin/kl/derewo/derewo-v-ww-bll-320000g-2012-12-31-1.0.zip"
 
 
+def _write_atomically(path: Path, write: Callable[[IO[bytes]], Any]) -> None:
+    """Write a file next to the path then move it into place in a single step.
+
+    :param path: The path of the file
+    :param write: A function that writes the contents to an open binary file
+
+    Other processes never see a partially written file, and ones that already
+    memory mapped the old file keep reading it.
+    """
+    fd, temporary = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            write(file)
+        os.replace(temporary, path)
+    finally:
+        Path(temporary).unlink(missing_ok=True)
+
+
+def get_words(length: int, language: Optional[str] = None) -> frozenset[str]:
+    """Get words of a given length in a given language.
+
+    The words are cached, so they're returned as a frozen set to keep callers
+    from changing them for each other.
+    """
+    return _get_words(length, language or "en")
+
+
+def get_sorted_words(length: int, language: Optional[str] = None) -> tuple[str, ...]:
+    """Get words of a given length in a given language in alphabetical order."""
+    return _get_sorted_words(length, language or "en")
+
+
+# The cached functions take the language explicitly, so the same words are
+# never loaded twice because the default language was given in a different way
 @lru_cache
-def get_words(length: int, language: Optional[str] = None) -> set[str]:
-    """Get words of a given length in a given language."""
-    if language is None or language == "en":
-        with open("/usr/share/dict/words") as file:
-            return {word.strip().lower() for word in file if length == len(word.strip())}
+def _get_sorted_words(length: int, language: str) -> tuple[str, ...]:
+    return tuple(sorted(_get_words(length, language)))
+
+
+@lru_cache
+def _get_words_index(length: int, language: str) -> dict[str, int]:
+    # Shared by all languages with the same words, so it mustn't be changed
+    return {word: i for i, word in enumerate(_get_sorted_words(length, language))}
+
+
+def _get_words(length: int, language: str) -> frozenset[str]:
+    # Each language's words are read once and grouped by length, so no
+    # separate cache is needed for each length
+    if language == "en":
+        words_by_length = _get_english_words_by_length()
     elif language == "de":
-        path = pystow.ensure("wordle", url=URL)
-        rv = set()
-        with zipfile.ZipFile(path) as zip_file:
-            with zip_file.open("derewo-v-ww-bll-320000g-2012-12-31-1.0.txt", mode="r") as file:
-                for line_bytes in file:
-                    line = line_bytes.strip().decode("iso-8859-1")
-                    if line.startswith("#") or "," in line:
-                        continue
-                    word, *_ = line.split()
-                    rv.add(word)
-        return {word.lower() for word in rv if length == len(word)}
+        words_by_length = _get_german_words_by_length()
     else:
         raise ValueError(f"Unhandled language: {language}")
+    return words_by_length.get(length, frozenset())
+
+
+@lru_cache(maxsize=1)
+def _get_english_words_by_length() -> dict[int, frozenset[str]]:
+    """Read the English dictionary once and group its words by length."""
+    rv = defaultdict(set)
+    with open("/usr/share/dict/words") as file:
+        for line in file:
+            word = line.strip()
+            rv[len(word)].add(word.lower())
+    return {length: frozenset(words) for length, words in rv.items()}
+
+
+@lru_cache(maxsize=1)
+def _get_german_words_by_length() -> dict[int, frozenset[str]]:
+    """Read the German dictionary once and group its words by length."""
+    path = pystow.ensure("wordle", url=URL)
+    rv = defaultdict(set)
+    with zipfile.ZipFile(path) as zip_file:
+        with zip_file.open("derewo-v-ww-bll-320000g-2012-12-31-1.0.txt", mode="r") as file:
+            for line_bytes in file:
+                line = line_bytes.strip()
+                if not line or line.startswith(b"#") or b"," in line:
+                    continue
+                word = line.split(None, 1)[0]
+                # ISO-8859-1 uses one byte per character, so the length of
+                # the encoded word is the same as the length of the word
+                rv[len(word)].add(word.decode("iso-8859-1").lower())
+    return {length: frozenset(words) for length, words in rv.items()}
+
+
+class Index(NamedTuple):
+    """A compressed sparse row (CSR) index of pairs of words with no overlapping letters.
+
+    The words indexed by ``neighbors[indptr[i]:indptr[i + 1]]`` come after the
+    i-th word and don't overlap with it.
+    """
+
+    #: A one-dimensional array of offsets into the neighbors, one longer than the words
+    indptr: np.ndarray
+    #: A one-dimensional array of word indices
+    neighbors: np.ndarray
 
 
 class Language:
@@ -53,72 +141,205 @@ class Language:
         self.length = length or 5
         self.language = language or "en"
         self.words = get_words(length=self.length, language=self.language)
-        self.words_list = tuple(sorted(self.words))
-        self.frequency = Counter(char for word in self.words for char in word)
-        total = sum(self.frequency.values())
-        self.frequency_norm = Counter(
-            {char: count / total for char, count in self.frequency.items()}
+        # The canonical order of the words, which all the arrays below follow
+        self.words_list = get_sorted_words(length=self.length, language=self.language)
+        self.words_index = _get_words_index(self.length, self.language)
+        # Encode all words as one buffer of fixed width code points, so the letters
+        # are found without making a string for each of them
+        code_points = np.frombuffer("".join(self.words_list).encode("utf-32-le"), dtype=np.uint32)
+        alphabet, codes = np.unique(code_points, return_inverse=True)
+        self.alphabet = "".join(map(chr, alphabet.tolist()))
+        self.codes = {char: i for i, char in enumerate(self.alphabet)}
+        self.bits = {char: 1 << code for char, code in self.codes.items()}
+        # A contiguous array with a row for each word of the codes of its letters
+        self.words_array = codes.astype(np.uint8).reshape(-1, self.length)
+        counts = np.bincount(codes, minlength=len(self.alphabet))
+        self.frequency = Counter(dict(zip(self.alphabet, counts.tolist())))
+        # The normalized frequency of each letter, indexed by its code
+        self.letter_scores = counts / counts.sum()
+        self.frequency_norm = Counter(dict(zip(self.alphabet, self.letter_scores.tolist())))
+        # A boolean array with a row for each word marking which letters it has
+        self.presence = np.zeros((len(self.words_list), len(self.alphabet)), dtype=bool)
+        self.presence[np.arange(len(self.words_list))[:, None], self.words_array] = True
+        self.word_scores = self.presence @ self.letter_scores
+        self.scores = dict(zip(self.words_list, self.word_scores.tolist()))
+        # For each position, the sorted indices of the words with each letter there
+        self.position_index = [
+            np.split(
+                np.argsort(column, kind="stable"),
+                np.cumsum(np.bincount(column, minlength=len(self.alphabet)))[:-1],
+            )
+            for column in self.words_array.T
+        ]
+        # 64 bits leave headroom for alphabets beyond a-z, like German
+        self.masks = np.bitwise_or.reduce(
+            np.left_shift(np.uint64(1), self.words_array.astype(np.uint64)), axis=1
+        )
+        # The same masks as Python integers, for checking words one at a time
+        self.word_masks = dict(zip(self.words_list, self.masks.tolist()))
+        # Words with repeated letters can never be part of an exclusive tuple. A
+        # word's letters are all different if no two are the same once sorted.
+        self.unique_indices = np.flatnonzero(
+            (np.diff(np.sort(self.words_array, axis=1), axis=1) != 0).all(axis=1)
         )
-        self.scores = {word: self.score_words(word) for word in self.words}
+        self._rng = random.Random()  # noqa:S311
+        self._np_rng = np.random.default_rng()
+
+    def seed(self, seed: Optional[int] = None) -> None:
+        """Seed the random number generators used by :meth:`choice` and :meth:`choice_many`.
+
+        :param seed: The seed. If not given, uses a fresh source of randomness,
+            e.g., so that worker processes that got a copy of the language don't
+            all choose the same words.
+        """
+        self._rng.seed(seed)
+        self._np_rng = np.random.default_rng(seed)
 
     def choice(self) -> str:
         """Randomly choose a word."""
-        return random.choice(self.words_list)  # noqa:S311
+        return self._rng.choice(self.words_list)
+
+    def choice_many(self, k: int) -> np.ndarray:
+        """Randomly choose many words at once, with replacement.
+
+        :param k: The number of words to choose
+        :returns: An array of the indices of the words in :data:`words_list`
+        """
+        return self._np_rng.integers(len(self.words_list), size=k)
+
+    def get_mask(self, word: Iterable[str]) -> int:
+        """Get an integer whose set bits correspond to the letters in the word (or any collection of letters)."""
+        return functools.reduce(operator.or_, (self.bits[char] for char in word), 0)
 
     def score_words(self, *words: str) -> float:
         """Score a set of words based on their unique letters weighted by their frequency."""
         chars = {char for word in words for char in word}
         return sum(self.frequency_norm[char] for char in chars)
 
-    def combinations(self, n: int, use_tqdm: bool = False):
-        """Iterate over combinations of allowed words."""
-        it = itt.combinations(self.words, n)
+    def combinations(self, n: int, use_tqdm: bool = False) -> Iterable[tuple[str, ...]]:
+        """Iterate over combinations of allowed words.
+
+        The iterator is returned directly instead of being wrapped in a generator,
+        and the progress bar refreshes at most once a second, since there can be
+        billions of combinations.
+        """
+        it: Iterable[tuple[str, ...]] = itt.combinations(self.words_list, n)
         if use_tqdm:
-            it = tqdm(it, total=math.comb(len(self.words), n), unit="comb", unit_scale=True)
-        yield from it
+            total = math.comb(len(self.words_list), n)
+            it = tqdm(
+                it,
+                total=total,
+                unit="comb",
+                unit_scale=True,
+                mininterval=1.0,
+                miniters=max(1, total // 10_000),
+            )
+        return it
+
+    def get_index(self, block_size: int = 256, force: bool = False) -> Index:
+        """Get an index of pairs of words with no overlapping letters, cached on disk.
+
+        :param block_size: The number of words whose exclusive partners are
+            calculated in a single vectorized operation. Larger blocks use more memory.
+        :param force: Should the index be recalculated even if it's already cached?
+        """
+        path = pystow.join("wordle", name=f"index_{self.language}_{self.length}.npz")
+        if path.is_file() and not force:
+            index = self._load_index(path)
+            if index is not None:
+                return index
+        index = self._calculate_index(block_size=block_size)
+        _write_atomically(
+            path,
+            lambda file: np.savez(
+                file, words=self.words_list, indptr=index.indptr, neighbors=index.neighbors
+            ),
+        )
+        return index
 
-    def get_index(self) -> dict[tuple[str, ...], list[str]]:
-        """Create an index of words with no overlapping letters."""
+    def _load_index(self, path: Path) -> Optional[Index]:
+        try:
+            with np.load(path) as data:
+                # The cache is only valid if the dictionary hasn't changed
+                if not np.array_equal(data["words"], self.words_list):
+                    return None
+                return Index(indptr=data["indptr"], neighbors=data["neighbors"])
+        except (OSError, EOFError, ValueError, zipfile.BadZipFile, KeyError):
+            # The cache is unreadable, e.g., because it was only partially written
+            return None
+
+    def _calculate_index(self, block_size: int) -> Index:
         # The goal of the index is to make a list of acceptable choices
-        index = defaultdict(list)
-        for left, right in tqdm(
-            itt.combinations(self.words_list, 2),
+        masks = self.masks[self.unique_indices]
+        lefts, rights = [], []
+        for start in tqdm(
+            range(0, len(masks), block_size),
             desc="Initial index",
-            unit_scale=True,
-            unit="pair",
-            total=math.comb(len(self.words_list), 2),
+            unit="block",
         ):
-            if _exclusive(left, right):
-                index[tuple([left])].append(right)
-        return dict(index)
-
-    def deepen_index(
-        self, index: dict[tuple[str, ...], list[str]]
-    ) -> dict[tuple[str, ...], list[str]]:
-        """Deepen an index of words with no overlapping letters with one more word."""
-        rv = defaultdict(list)
-        for key, values in tqdm(index.items(), desc="Extending index"):
-            for left, right in itt.combinations(values, 2):
-                if _exclusive(left, right):
-                    rv[(*key, left)].append(right)
-        return dict(rv)
+            stop = start + block_size
+            # Only compare to words coming later to get each pair once
+            exclusive = (masks[start:stop, None] & masks[None, start:]) == 0
+            rows, columns = np.triu(exclusive, k=1).nonzero()
+            lefts.append(self.unique_indices[start + rows])
+            rights.append(self.unique_indices[start + columns])
+        if not lefts:
+            # No words are free of repeated letters, so none have neighbors
+            return Index(
+                indptr=np.zeros(len(self.words_list) + 1, dtype=np.int64),
+                neighbors=np.empty(0, dtype=np.int32),
+            )
+        counts = np.bincount(np.concatenate(lefts), minlength=len(self.words_list))
+        return Index(
+            indptr=np.concatenate([[0], np.cumsum(counts)]),
+            neighbors=np.concatenate(rights).astype(np.int32),
+        )
 
     def iter_k_tuples(self, k: int) -> Iterable[tuple[str, ...]]:
-        """Unwrap an index and iterate over its word tuples.
+        """Iterate over tuples of words with no overlapping letters.
 
         :param k: Number of words in the sequence
         """
-        if k == 1:
-            for word in self.words_list:
-                yield (word,)
+        for indices, _score in self._iter_scored_k_tuples(k):
+            yield tuple(self.words_list[i] for i in indices)
+
+    def _iter_scored_k_tuples(self, k: int) -> Iterable[tuple[tuple[int, ...], float]]:
+        """Iterate over tuples of word indices with no overlapping letters and their scores.
+
+        :param k: Number of words in the sequence
+
+        Since the words in each tuple don't share any letters, the score of a
+        tuple is the sum of the precalculated scores of its words.
+        """
+        if k == 1 or HAS_NUMBA:
+            tuples, scores = self._get_scored_k_tuples_array(k)
+            yield from zip(map(tuple, tuples.tolist()), scores.tolist())
         else:
             index = self.get_index()
-            for _ in range(k - 2):
-                index = self.deepen_index(index)
-            # unwind index
-            for key, values in index.items():
-                for value in values:
-                    yield *key, value
+            search = _compile_search(k)
+            yield from search(
+                self.masks.tolist(),
+                self.word_scores.tolist(),
+                index.indptr,
+                index.neighbors,
+                self.length,
+            )
+
+    def _get_scored_k_tuples_array(self, k: int) -> tuple[np.ndarray, np.ndarray]:
+        """Get an array of shape (M, k) of word indices and an array of their M scores."""
+        if k == 1:
+            tuples = np.arange(len(self.words_list))[:, None]
+        else:
+            tuples = self._enumerate_k_tuples(k)
+        return tuples, self.word_scores[tuples].sum(axis=1)
+
+    def _enumerate_k_tuples(self, k: int) -> np.ndarray:
+        """Get an array of shape (M, k) of word indices with a compiled kernel.
+
+        :param k: Number of words in the sequence
+        """
+        masks = self.masks[self.unique_indices]
+        return self.unique_indices[enumerate_k_tuples(masks, k, self.length)]
 
     def get_top_words(
         self,
@@ -126,20 +347,114 @@ class Language:
         k: int,
         n: Optional[int] = 30,
     ) -> list[tuple[tuple[str, ...], float]]:
-        """Get the top n word sequences of length k."""
-        scores = Counter({words: self.score_words(*words) for words in self.iter_k_tuples(k)})
-        return scores.most_common(n)  # type:ignore
+        """Get the top n word sequences of length k.
 
+        :param k: Number of words in the sequence
+        :param n: Number of sequences to return. If None, returns all.
+        """
+        if k == 1 or HAS_NUMBA:
+            tuples, scores = self._get_scored_k_tuples_array(k)
+            if n is None or not 0 < n < len(scores):
+                candidates = np.arange(len(scores))
+            else:
+                # Partitioning is linear, so only the top n and any ties with
+                # the nth sequence need to be sorted
+                cutoff = np.partition(scores, len(scores) - n)[len(scores) - n]
+                candidates = np.flatnonzero(scores >= cutoff)
+            # Ties are broken by the word indices, the same as below
+            keys = (*tuples[candidates].T[::-1], -scores[candidates])
+            order = candidates[np.lexsort(keys)][:n]
+            top: Iterable[tuple[tuple[int, ...], float]] = zip(
+                tuples[order].tolist(), scores[order].tolist()
+            )
+        else:
+            scored = self._iter_scored_k_tuples(k)
+            if n is None:
+                top = sorted(scored, key=_by_score)
+            else:
+                # Keeps a heap of size n rather than sorting all sequences
+                top = heapq.nsmallest(n, scored, key=_by_score)
+        return [(tuple(self.words_list[i] for i in indices), score) for indices, score in top]
 
-def _exclusive(left: str, right: str) -> bool:
-    """Return if two strings don't share any characters or have duplicates.
 
-    >>> _exclusive("abc", "def")
-    True
-    >>> _exclusive("abcc", "def")
-    False
-    >>> _exclusive("abc", "cde")
-    False
+def _by_score(pair: tuple[tuple[int, ...], float]) -> tuple[float, tuple[int, ...]]:
+    """Order scored sequences by descending score, then by their word indices."""
+    indices, score = pair
+    return -score, indices
+
+
+def _popcount(mask: int) -> int:
+    """Count the number of set bits.
+
+    >>> _popcount(0b1011)
+    3
     """
-    counter = Counter(left) + Counter(right)
-    return 1 == counter.most_common(1)[0][1]
+    return bin(mask).count("1")
+
+
+def _union(masks: Sequence[int], indices: Iterable[int]) -> int:
+    """Get the union of the masks at the given indices."""
+    rv = 0
+    for i in indices:
+        rv |= masks[i]
+    return rv
+
+
+@lru_cache(maxsize=None)
+def _compile_search(k: int) -> Callable[..., Iterable[tuple[tuple[int, ...], float]]]:
+    """Generate a depth-first search for k-tuples of words with its k loops unrolled.
+
+    :param k: Number of words in the sequence
+    :returns: A generator function that takes a list of masks, a list of word
+        scores, the arrays of a pair :class:`Index`, and the length of the words,
+        then yields tuples of word indices with no overlapping letters and their scores.
+
+    Since having no overlapping letters is preserved by taking any subset of a
+    tuple, each loop only iterates over the candidates that are left after adding
+    a word, so the intermediate (k-1)-tuples never need to be materialized. Writing
+    out one loop per word avoids the overhead of recursion in pure Python. For
+    example, this is generated for k=3::
+
+        def search(masks, scores, indptr, neighbors, length):
+            for i0 in range(len(indptr) - 1):
+                s0 = scores[i0]
+                c1 = neighbors[indptr[i0]:indptr[i0 + 1]].tolist()
+                if len(c1) < 2 or _popcount(_union(masks, c1)) < 2 * length:
+                    continue
+                for p1, i1 in enumerate(c1):
+                    s1 = s0 + scores[i1]
+                    m1 = masks[i1]
+                    c2 = [j for j in c1[p1 + 1:] if not masks[j] & m1]
+                    for i2 in c2:
+                        yield (i0, i1, i2), s1 + scores[i2]
+    """
+    lines = [
+        "def search(masks, scores, indptr, neighbors, length):",
+        "    for i0 in range(len(indptr) - 1):",
+        "        s0 = scores[i0]",
+        "        c1 = neighbors[indptr[i0]:indptr[i0 + 1]].tolist()",
+    ]
+    for depth in range(1, k):
+        indent = "    " * (depth + 1)
+        remaining = k - depth
+        if remaining == 1:
+            indices = ", ".join(f"i{d}" for d in range(k))
+            lines.append(f"{indent}for i{depth} in c{depth}:")
+            lines.append(f"{indent}    yield ({indices}), s{depth - 1} + scores[i{depth}]")
+        else:
+            # Prune if the candidates can't possibly cover enough new letters
+            lines.extend(
+                [
+                    f"{indent}if len(c{depth}) < {remaining} or "
+                    f"_popcount(_union(masks, c{depth})) < {remaining} * length:",
+                    f"{indent}    continue",
+                    f"{indent}for p{depth}, i{depth} in enumerate(c{depth}):",
+                    f"{indent}    s{depth} = s{depth - 1} + scores[i{depth}]",
+                    f"{indent}    m{depth} = masks[i{depth}]",
+                    f"{indent}    c{depth + 1} = "
+                    f"[j for j in c{depth}[p{depth} + 1:] if not masks[j] & m{depth}]",
+                ]
+            )
+    namespace = {"_popcount": _popcount, "_union": _union}
+    exec(compile("\n".join(lines), f"<search k={k}>", "exec"), namespace)  # noqa:S102
+    return namespace["search"]  # type: ignore
@@ -2,8 +2,12 @@
 
 import click
 from rich.console import Console
+from rich.text import Text
 
-from .wordle import CALL_COLORS, Configuration, Game, get_constraints, valid_under_constraints
+from .wordle import CALL_COLORS, Configuration, Game, get_constraints, get_valid_indices
+
+#: The style for the letters with each call, indexed by its code
+_CALL_STYLES = tuple(f"on {color}" for color in CALL_COLORS)
 
 
 @click.command()
@@ -32,14 +36,12 @@ def main(language: str, length: int, height: int):
         guess = input("Guess: ")
         if guess == "help":
             positions, appears, no_appears = get_constraints(game.guesses, game.calls)
-            valid = sorted(
-                word
-                for word in configuration.words
-                if valid_under_constraints(word, positions, appears, no_appears)
-            )
-            print(",".join(valid))
+            indices = get_valid_indices(configuration, positions, appears, no_appears)
+            print(",".join(configuration.words_list[i] for i in indices))
 
-        while len(guess) != game.configuration.length or guess not in game.configuration.words:
+        while (
+            len(guess) != game.configuration.length or guess not in game.configuration.words_index
+        ):
             guess = input("Guess: ")
         game.append_guess(guess)
 
@@ -61,10 +63,9 @@ def print_game(console: Console, game: Game) -> None:
         style="underline",
     )
     for call, guess in zip(game.calls, game.guesses):
-        console.print("       ", end="")
-        for c, g in zip(call, guess):
-            console.print(g, style=f"on {CALL_COLORS[c]}", end="")
-        console.print()
+        # Assemble each row so it's rendered in a single call
+        row = Text.assemble("       ", *((g, _CALL_STYLES[c]) for c, g in zip(call, guess)))
+        console.print(row)
 
 
 if __name__ == "__main__":
@@ -1,3 +1,5 @@
+"""Demonstrate the different players on a single word."""
+
 from pyrdle.wordle import (
     CachedGreedyInitialGuesser,
     Configuration,
@@ -2,28 +2,82 @@
 
 from __future__ import annotations
 
+import functools
+import hashlib
 import itertools as itt
-from collections import Counter
-from typing import Any, Literal, Mapping, Optional, Sequence, Type
-
+import json
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Hashable, Iterable, Optional, Sequence, Type, TypeVar
+
+import numpy as np
+import pystow
 from class_resolver import Hint, Resolver
 from tabulate import tabulate
 from tqdm import tqdm
 
-from .lang import Language
+from .kernels import HAS_NUMBA, calculate_responses, first_valid, get_mp_context
+from .lang import Language, _write_atomically
+
+X = TypeVar("X")
+
+#: The call for a letter of a guess. The calls for a whole guess are stored as
+#: :class:`bytes` with one of the following codes for each letter.
+Call = int
+#: The letter does not appear in the word
+INCORRECT: Call = 0
+#: The letter appears in the word, but somewhere else
+SOMEWHERE: Call = 1
+#: The letter is in the right position
+CORRECT: Call = 2
+
+#: The emoji for each call, indexed by its code
+CALLS: Sequence[str] = ("⬛", "🟨", "🟩")
+#: The color for each call, indexed by its code
+CALL_COLORS: Sequence[str] = ("white", "yellow", "green")
+#: The version of the rules for making calls, which invalidates cached responses when changed
+_RESPONSES_VERSION = 2
+#: A table for :meth:`str.translate` from the characters of the call codes to their emoji
+_CALLS_TABLE = str.maketrans(dict(enumerate(CALLS)))
+
+
+def encode_calls(calls: Sequence[Call]) -> int:
+    """Encode the calls for a guess as a single integer, reading them as base-3 digits.
+
+    >>> encode_calls(bytes([CORRECT, INCORRECT, SOMEWHERE]))
+    11
+    """
+    # Horner's method, from the most significant digit, avoids calculating powers
+    code = 0
+    for call in reversed(calls):
+        code = 3 * code + call
+    return code
+
+
+def decode_calls(code: int, length: int) -> bytes:
+    """Decode the calls for a guess from the integer given by :func:`encode_calls`.
+
+    >>> decode_calls(11, 3) == bytes([CORRECT, INCORRECT, SOMEWHERE])
+    True
+    """
+    return bytes(code // 3**i % 3 for i in range(length))
 
-Call = Literal["correct", "somewhere", "incorrect"]
 
-CALLS: Mapping[Call, str] = {
-    "correct": "🟩",
-    "somewhere": "🟨",
-    "incorrect": "⬛",
-}
-CALL_COLORS: Mapping[Call, str] = {
-    "correct": "green",
-    "somewhere": "yellow",
-    "incorrect": "white",
-}
+@lru_cache(maxsize=None)
+def _get_calls_table(length: int) -> tuple[bytes, ...]:
+    """Get the decoded calls for every code, indexed by the code."""
+    return tuple(decode_calls(code, length) for code in range(3**length))
+
+
+def render_calls(calls: bytes) -> str:
+    """Render the calls for a guess as emoji in a single translation.
+
+    >>> render_calls(bytes([CORRECT, INCORRECT, SOMEWHERE]))
+    '🟩⬛🟨'
+    """
+    return calls.decode("ascii").translate(_CALLS_TABLE)
 
 
 class Configuration(Language):
@@ -43,34 +97,211 @@ class Configuration(Language):
         """
         super().__init__(length=length, language=language)
         self.height = height or 6
+        self._responses: Optional[np.ndarray] = None
+        self._caches: dict[str, OrderedDict[Hashable, Any]] = {}
 
-    @staticmethod
-    def success(counter) -> float:
-        """Calculate the percentage of words that were solved."""
-        successes = sum(value for key, value in counter.items() if isinstance(key, int))
-        total = sum(counter.values())
-        return successes / total
-
-    def speed(self, counter) -> float:
-        """Calculate the average solve speed."""
-        return sum(key * value for key, value in counter.items() if isinstance(key, int)) / len(
-            self.words
+    def __getstate__(self) -> dict[str, Any]:
+        """Get the state for pickling, without the responses or the cached guesses.
+
+        Each process that unpickles the configuration, e.g., the workers used by
+        :meth:`Controller.play_all`, memory maps the responses from the cache on disk
+        instead of getting its own copy.
+        """
+        state = self.__dict__.copy()
+        state["_responses"] = None
+        state["_caches"] = {}
+        return state
+
+    def _memoize(self, name: str, key: Hashable, calculate: Callable[[], X], maxsize: int) -> X:
+        """Get a value from one of the configuration's caches, calculating it on a miss.
+
+        :param name: The name of the cache, e.g., of the player whose guesses it holds
+        :param key: The key of the value, e.g., the guesses and calls so far
+        :param calculate: A function that calculates the value
+        :param maxsize: The number of values to keep. The least recently used
+            values are dropped first.
+
+        Unlike :func:`functools.lru_cache` on a module-level function, the caches
+        don't keep the configuration alive and are dropped along with it.
+        """
+        cache = self._caches.setdefault(name, OrderedDict())
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = cache[key] = calculate()
+        if len(cache) > maxsize:
+            cache.popitem(last=False)
+        return value
+
+    def get_responses(self, block_size: int = 256, force: bool = False) -> np.ndarray:
+        """Get the encoded calls for every guess against every secret word, cached on disk.
+
+        :param block_size: The number of guesses whose calls are calculated in a
+            single vectorized operation. Larger blocks use more memory.
+        :param force: Should the responses be recalculated even if they're already cached?
+        :returns: A read-only array of shape (N, N) whose i-th row has the calls
+            encoded with :func:`encode_calls` for guessing the i-th word when each
+            word is the secret.
+
+        The array is quadratic in the number of words, so it's only calculated when
+        it's first needed, and it's memory mapped from the cache rather than read.
+        Both files of the cache are replaced atomically, so processes sharing it,
+        e.g., the workers of :meth:`Controller.evaluate`, never read a torn matrix.
+        """
+        if self._responses is not None and not force:
+            return self._responses
+        path = pystow.join(
+            "wordle",
+            name=f"responses_v{_RESPONSES_VERSION}_{self.language}_{self.length}.npy",
         )
+        words_path = path.with_name(f"{path.stem}_words.npy")
+        # The cache is only valid if the dictionary hasn't changed
+        if path.is_file() and not force and self._is_cached(words_path):
+            try:
+                self._responses = np.load(path, mmap_mode="r")
+            except (OSError, EOFError, ValueError):
+                # The matrix is unreadable, e.g., because it was only partially written
+                pass
+            else:
+                return self._responses
+        words_path.unlink(missing_ok=True)
+        responses = self._calculate_responses(block_size=block_size)
+        _write_atomically(path, lambda file: np.save(file, responses))
+        # The words are saved last, so the cache is only valid if both were written
+        _write_atomically(words_path, lambda file: np.save(file, self.words_list))
+        self._responses = np.load(path, mmap_mode="r")
+        return self._responses
+
+    def get_loaded_responses(self) -> Optional[np.ndarray]:
+        """Get the responses only if they were already loaded, without loading them.
+
+        :returns: The same array as :meth:`get_responses` if it was already called,
+            e.g., by an :class:`EntropyPlayer`, otherwise None.
+        """
+        return self._responses
 
-    def quality(self, counter) -> float:
-        """Calculate a quality score for successes."""
+    def _is_cached(self, words_path: Path) -> bool:
+        try:
+            words = np.load(words_path)
+        except (OSError, EOFError, ValueError):
+            # The words are missing, e.g., because another process is replacing them
+            return False
+        return np.array_equal(words, self.words_list)
+
+    def _calculate_responses(self, block_size: int) -> np.ndarray:
+        n = len(self.words_list)
+        dtype = np.min_scalar_type(3**self.length - 1)
+        rv = np.empty((n, n), dtype=dtype)
+        if HAS_NUMBA:
+            calculate_responses(self.words_array, len(self.alphabet), CORRECT, SOMEWHERE, rv)
+            return rv
+        # The encoded calls always fit in the dtype, so they can be summed in it
+        weights = (3 ** np.arange(self.length)).astype(dtype)
+        for start in range(0, n, block_size):
+            stop = min(start + block_size, n)
+            rv[start:stop] = self.get_calls(np.arange(start, stop)) @ weights
+        return rv
+
+    def get_calls(self, guesses: np.ndarray, secrets: Optional[np.ndarray] = None) -> np.ndarray:
+        """Get the calls for each of the given guesses against each of the given secret words.
+
+        :param guesses: An array of the indices of the guesses in :data:`Language.words_list`
+        :param secrets: An array of the indices of the secret words. If not given,
+            uses all words.
+        :returns: An array of shape (len(guesses), len(secrets), length) of the codes
+            of the calls for each letter
+
+        This gives the same calls as :meth:`Game.append_guess`, but for many
+        pairs of words at once with vectorized operations. The responses encode
+        the same calls too, whether they're calculated by
+        :func:`pyrdle.kernels.calculate_responses` or from this:
+
+        >>> configuration = Configuration(length=5)
+        >>> words = ["abide", "speed", "those", "geese", "elder", "lever"]
+        >>> indices = np.array([configuration.words_index[word] for word in words])
+        >>> calls = configuration.get_calls(indices, indices)
+        >>> get_calls = _compile_get_calls(5)
+        >>> all(
+        ...     bytes(calls[i, j]) == get_calls(secret, guess, dict(Counter(secret)))
+        ...     for i, guess in enumerate(words)
+        ...     for j, secret in enumerate(words)
+        ... )
+        True
+        >>> responses = np.empty((len(words), len(words)), dtype=np.uint8)
+        >>> calculate_responses(
+        ...     configuration.words_array[indices],
+        ...     len(configuration.alphabet),
+        ...     CORRECT,
+        ...     SOMEWHERE,
+        ...     responses,
+        ... )
+        >>> np.array_equal(responses, calls @ 3 ** np.arange(5))
+        True
+        """
+        secrets_array = self.words_array if secrets is None else self.words_array[secrets]
+        guesses_array = self.words_array[guesses]
+        correct = guesses_array[:, None, :] == secrets_array[None, :, :]
+        rv = np.where(correct, CORRECT, INCORRECT).astype(np.uint8)
+        for i in range(self.length):
+            letter = guesses_array[:, i, None, None]
+            # The copies of the letter in the secret word that aren't called correct...
+            available = ((secrets_array == letter) & ~correct).sum(axis=2)
+            # ...minus the ones already called somewhere for the guess's earlier copies
+            used = ((guesses_array[:, None, :i] == letter) & ~correct[:, :, :i]).sum(axis=2)
+            rv[:, :, i][~correct[:, :, i] & (available > used)] = SOMEWHERE
+        return rv
+
+    @staticmethod
+    def success(histogram: np.ndarray) -> float:
+        """Calculate the percentage of words that were solved.
+
+        :param histogram: A histogram from :meth:`Controller.play_words`, e.g., via
+            :meth:`Controller.play_all` or :meth:`Controller.play_random`
+        """
+        return 1 - float(histogram[0] / histogram.sum())
+
+    @staticmethod
+    def speed(histogram: np.ndarray) -> float:
+        """Calculate the average solve speed, where lost games count as zero guesses.
+
+        :param histogram: A histogram from :meth:`Controller.play_words`, e.g., via
+            :meth:`Controller.play_all` or :meth:`Controller.play_random`
+        """
+        # Normalize by the number of games played, which isn't always the number of words
+        return float(histogram @ np.arange(len(histogram))) / float(histogram.sum())
+
+    def quality(self, histogram: np.ndarray) -> float:
+        """Calculate a quality score for successes.
+
+        :param histogram: A histogram from :meth:`Controller.play_words`, e.g., via
+            :meth:`Controller.play_all` or :meth:`Controller.play_random`
+        """
         # experimental - needs to combine both the success rate and average speed
-        s = self.speed(counter)
-        return (1 - self.success(counter)) * (self.height - s) / self.height
+        s = self.speed(histogram)
+        return (1 - self.success(histogram)) * (self.height - s) / self.height
 
 
 class Game:
     """Represents a game of Wordle."""
 
+    # Many games are made when playing all words, so they get a fixed layout
+    __slots__ = (
+        "configuration",
+        "word",
+        "counts",
+        "guesses",
+        "calls",
+        "won",
+        "_get_calls",
+        "_word_index",
+    )
+
     configuration: Configuration
     word: str
+    counts: dict[str, int]
     guesses: list[str]
-    calls: list[Sequence[Call]]
+    calls: list[bytes]
+    won: bool
 
     def __init__(self, configuration: Configuration, word: Optional[str] = None):
         """Instantiate the game.
@@ -80,49 +311,53 @@ class Game:
         """
         self.configuration = configuration
         self.word = word or self.configuration.choice()
+        # The number of times each letter appears in the secret word
+        self.counts = dict(Counter(self.word))
+        self._get_calls = _compile_get_calls(self.configuration.length)
+        self._word_index = self.configuration.words_index.get(self.word)
         self.guesses = []
         self.calls = []
+        self.won = False
 
     def state(self) -> Optional[bool]:
         """Return the state of the game -> true=win, false=lose, None=still playing."""
-        if len(self.guesses) >= self.configuration.height:
-            return False
-        elif 0 < len(self.guesses) and self.guesses[-1] == self.word:
+        if self.won:
             return True
+        elif len(self.guesses) >= self.configuration.height:
+            return False
         return None
 
     def append_guess(self, word: str):
         """Make a guess."""
         if self.configuration.length != len(word):
             raise ValueError(f"Word wrong length: {word} (should be {self.configuration.length}")
-        if word not in self.configuration.words:
+        index = self.configuration.words_index.get(word)
+        if index is None:
             raise KeyError(f"Word not found: {word}")
         self.guesses.append(word)
-        self.calls.append(
-            tuple(
-                self._call(actual_character, given_character)
-                for actual_character, given_character in zip(self.word, word)
-            )
-        )
-
-    def _call(self, actual_character: str, given_character: str) -> Call:
-        if actual_character == given_character:
-            return "correct"
-        elif given_character in self.word:
-            return "somewhere"
+        self.won = word == self.word
+        # Look up the calls if the responses were already loaded, e.g., by an EntropyPlayer
+        responses = self.configuration.get_loaded_responses()
+        if responses is not None and self._word_index is not None:
+            code = responses.item(index, self._word_index)
+            self.calls.append(_get_calls_table(self.configuration.length)[code])
         else:
-            return "incorrect"
+            self.calls.append(self._get_calls(self.word, word, self.counts))
 
     def print(self) -> None:
         """Print the game to the console."""
-        for guess, call in zip(self.guesses, self.calls):
-            print("".join(map(CALLS.__getitem__, call)), guess)
+        rows = [f"{render_calls(call)} {guess}" for guess, call in zip(self.guesses, self.calls)]
+        # Join the rows so they're written at once, rather than one at a time
+        if rows:
+            print("\n".join(rows))
 
     def play(self, player, verbose: bool = False):
         """Play a full game."""
         if verbose:
             print("Word is", self.word)
-        while self.state() is None:
+        height = self.configuration.height
+        # Equivalent to checking the state, without a method call each round
+        while not self.won and len(self.guesses) < height:
             if verbose:
                 print("\nplaying round", 1 + len(self.guesses))
             guess = player.guess(guesses=self.guesses, calls=self.calls)
@@ -131,6 +366,84 @@ class Game:
                 self.print()
 
 
+@lru_cache(maxsize=None)
+def _compile_get_calls(length: int) -> Callable[[str, str, dict[str, int]], bytes]:
+    """Generate a function that gets the calls for a guess with its loops over the letters unrolled.
+
+    :param length: The number of letters in each word
+    :returns: A function that takes the secret word, the guess, and the number of
+        times each letter appears in the secret word, then returns the calls for
+        the guess
+
+    A letter is correct if it's in the same position in the secret word. Like in
+    Wordle, the other letters are called somewhere from left to right only while
+    the secret word has copies of them that haven't been called yet, so e.g. only
+    one of two guessed e's is called if the secret word has a single e. Writing out
+    the checks for each position avoids the overhead of loops in pure Python, and
+    unpacking the letters into local variables avoids indexing the words more than
+    once. For example, this is generated for length=2::
+
+        def get_calls(word, guess, counts):
+            remaining = counts.copy()
+            w0, w1, = word
+            g0, g1, = guess
+            c0 = c1 = 0
+            if w0 == g0:
+                c0 = 2
+                remaining[g0] -= 1
+            if w1 == g1:
+                c1 = 2
+                remaining[g1] -= 1
+            if c0 == 0 and remaining.get(g0):
+                c0 = 1
+                remaining[g0] -= 1
+            if c1 == 0 and remaining.get(g1):
+                c1 = 1
+                remaining[g1] -= 1
+            return bytes((c0, c1))
+
+    Only as many copies of a letter are called as the secret word has, and ones
+    called correct count first:
+
+    >>> get_calls = _compile_get_calls(5)
+    >>> render_calls(get_calls("abide", "speed", dict(Counter("abide"))))
+    '⬛⬛🟨⬛🟨'
+    >>> render_calls(get_calls("those", "geese", dict(Counter("those"))))
+    '⬛⬛⬛🟩🟩'
+    >>> render_calls(get_calls("elder", "lever", dict(Counter("elder"))))
+    '🟨🟨⬛🟩🟩'
+    """
+    calls = [f"c{i}" for i in range(length)]
+    # The trailing commas make the unpacking valid even for a single letter
+    lines = [
+        "def get_calls(word, guess, counts):",
+        "    remaining = counts.copy()",
+        f"    {''.join(f'w{i}, ' for i in range(length))}= word",
+        f"    {''.join(f'g{i}, ' for i in range(length))}= guess",
+        f"    {' = '.join(calls)} = {INCORRECT}",
+    ]
+    for i in range(length):
+        lines.extend(
+            [
+                f"    if w{i} == g{i}:",
+                f"        c{i} = {CORRECT}",
+                f"        remaining[g{i}] -= 1",
+            ]
+        )
+    for i in range(length):
+        lines.extend(
+            [
+                f"    if c{i} == {INCORRECT} and remaining.get(g{i}):",
+                f"        c{i} = {SOMEWHERE}",
+                f"        remaining[g{i}] -= 1",
+            ]
+        )
+    lines.append(f"    return bytes(({', '.join(calls)},))")
+    namespace: dict[str, Any] = {}
+    exec(compile("\n".join(lines), f"<get_calls length={length}>", "exec"), namespace)  # noqa:S102
+    return namespace["get_calls"]
+
+
 class Player:
     """An abstract class for a player."""
 
@@ -141,6 +454,16 @@ class Player:
         """
         self.configuration = configuration
 
+    def reset(self) -> None:
+        """Reset the player's state so it can play a new game."""
+
+    def prepare(self) -> None:
+        """Prepare anything that's shared by all games and expensive to make.
+
+        This is called once before the player is copied to worker processes, e.g.,
+        by :meth:`Controller.evaluate`, so they don't each make it themselves.
+        """
+
     def guess(self, guesses: list[str], calls: list[Sequence[Call]]) -> str:
         """Return the next row to play."""
         raise NotImplementedError
@@ -158,6 +481,12 @@ class InitialGuesser(Player):
     """A player that starts with a given sequence of initial guesses."""
 
     initial: Sequence[str]
+    n: int
+    # Constraints from the guesses so far, updated with each new guess
+    positions: dict[int, str]
+    appears: set[str]
+    no_appears: set[str]
+    n_seen: int
 
     def __init__(self, *, configuration: Configuration, initial: Sequence[str]):  # noqa:D107
         super().__init__(configuration=configuration)
@@ -165,10 +494,31 @@ class InitialGuesser(Player):
             if len(guess) != self.configuration.length:
                 raise ValueError(f"Initial {guess=} is not {self.configuration.length=}")
         self.initial = initial
+        self.reset()
+
+    def reset(self) -> None:
+        """Reset the player to the first initial guess with no constraints."""
         self.n = 0
+        self.positions = {}
+        self.appears = set()
+        self.no_appears = set()
+        self.n_seen = 0
+
+    def update_constraints(self, guess: str, call: Sequence[Call]) -> None:
+        """Update the constraints with the call for a new guess."""
+        _update_constraints(
+            positions=self.positions,
+            appears=self.appears,
+            no_appears=self.no_appears,
+            guess=guess,
+            call=call,
+        )
 
     def guess(self, guesses: list[str], calls: list[Sequence[Call]]) -> str:
         """Guess the initial guesses, then defer to :func:`guess_late_game`."""
+        for guess, call in itt.islice(zip(guesses, calls), self.n_seen, None):
+            self.update_constraints(guess=guess, call=call)
+        self.n_seen = len(guesses)
         if self.n < len(self.initial):
             guess = self.initial[self.n]
             self.n += 1
@@ -187,9 +537,18 @@ class InitialGuesser(Player):
 
 
 def get_constraints(
-    guesses: list[str], calls: list[Sequence[Call]]
+    guesses: Sequence[str], calls: Sequence[Sequence[Call]]
 ) -> tuple[dict[int, str], set[str], set[str]]:
-    """Get constraints."""
+    """Get constraints.
+
+    A letter is only known not to appear if none of its copies were called
+    correct or somewhere, so the extra e's of "geese" don't rule out the e:
+
+    >>> calls = [bytes([INCORRECT, INCORRECT, INCORRECT, CORRECT, CORRECT])]
+    >>> positions, appears, no_appears = get_constraints(["geese"], calls)
+    >>> positions, sorted(appears), sorted(no_appears)
+    ({3: 's', 4: 'e'}, ['e', 's'], ['g'])
+    """
     positions = {}
     appears = set()
     no_appears = set()
@@ -206,110 +565,225 @@ def _update_constraints(
     guess: str,
 ) -> None:
     for i, c, x in zip(itt.count(), call, guess):
-        if c == "correct":
+        if c == CORRECT:
             positions[i] = x
             appears.add(x)
-        elif c == "somewhere":
+        elif c == SOMEWHERE:
             appears.add(x)
-        elif c == "incorrect":
+    # Extra copies of a letter that appears are also called incorrect, so a
+    # letter is only known not to appear if none of its copies were found
+    for c, x in zip(call, guess):
+        if c == INCORRECT and x not in appears:
             no_appears.add(x)
 
 
 def valid_under_constraints(
     word: str, positions: dict[int, str], appears: set[str], no_appears: set[str]
 ) -> bool:
-    """Check if the word is valid under the constraints."""
-    return (
-        all(word[i] == x for i, x in positions.items())
-        and all(char in word for char in appears)
-        and all(char not in word for char in no_appears)
-    )
+    """Check if the word is valid under the constraints.
+
+    The positions are checked first since they rule out the most words, then
+    the letters that must not appear, since there are usually more of them.
+    Explicit loops are used rather than :func:`all` so no generator is made
+    for each word.
+
+    >>> valid_under_constraints("sheep", {0: "s"}, {"e"}, {"a"})
+    True
+    >>> valid_under_constraints("shape", {0: "s"}, {"e"}, {"a"})
+    False
+    """
+    for i, x in positions.items():
+        if word[i] != x:
+            return False
+    for char in no_appears:
+        if char in word:
+            return False
+    for char in appears:
+        if char not in word:
+            return False
+    return True
+
+
+def _iter_valid(
+    language: Language,
+    words: Iterable[str],
+    positions: dict[int, str],
+    appears: set[str],
+    no_appears: set[str],
+) -> Iterable[str]:
+    """Iterate over the words valid under the constraints, like :func:`valid_under_constraints`.
+
+    The letters that must and must not appear are each folded into a single
+    letter mask, so they're checked against :data:`Language.word_masks` with one
+    bitwise operation each instead of a search of the word for each letter.
+    It gives the same words as :func:`valid_under_constraints`, even with
+    constraints from guesses with repeated letters:
+
+    >>> language = Language(length=5)
+    >>> calls = bytes([INCORRECT, CORRECT, SOMEWHERE, INCORRECT, INCORRECT])
+    >>> positions, appears, no_appears = get_constraints(["geese"], [calls])
+    >>> valid = list(_iter_valid(language, language.words_list, positions, appears, no_appears))
+    >>> valid == [
+    ...     word
+    ...     for word in language.words_list
+    ...     if valid_under_constraints(word, positions, appears, no_appears)
+    ... ]
+    True
+    """
+    word_masks = language.word_masks
+    appears_mask = language.get_mask(appears)
+    no_appears_mask = language.get_mask(no_appears)
+    for word in words:
+        mask = word_masks[word]
+        if (mask & appears_mask) != appears_mask or mask & no_appears_mask:
+            continue
+        for i, x in positions.items():
+            if word[i] != x:
+                break
+        else:
+            yield word
+
+
+def get_valid_indices(
+    language: Language, positions: dict[int, str], appears: set[str], no_appears: set[str]
+) -> np.ndarray:
+    """Get a sorted array of the indices in :data:`Language.words_list` of words valid under the constraints.
+
+    This checks words with vectorized operations, as opposed to applying
+    :func:`valid_under_constraints` to each word. If any letters' positions are
+    known, only the words with those letters there are checked, using
+    :data:`Language.position_index`. The letters that must and must not appear
+    are each folded into a single letter mask (see :meth:`Language.get_mask`)
+    and compared against :data:`Language.masks`.
+    """
+    if positions:
+        indices = functools.reduce(
+            np.intersect1d,
+            (language.position_index[i][language.codes[char]] for i, char in positions.items()),
+        )
+    else:
+        indices = np.arange(len(language.words_list))
+    masks = language.masks[indices]
+    mask = np.ones(len(indices), dtype=bool)
+    if appears:
+        appears_mask = np.uint64(language.get_mask(appears))
+        mask &= (masks & appears_mask) == appears_mask
+    if no_appears:
+        mask &= (masks & np.uint64(language.get_mask(no_appears))) == 0
+    return indices[mask]
 
 
 class GreedyInitialGuesser(InitialGuesser):
     """Guess the initial guesses then use process of elimination to make new guesses."""
 
     def guess_late_game(self, guesses: list[str], calls: list[Sequence[Call]]) -> str:
-        """Guess the first word that matches the constraints given by all past guesses."""
-        positions, appears, no_appears = get_constraints(guesses, calls)
-        for word in self.configuration.words:
-            if word not in guesses and valid_under_constraints(
-                word, positions, appears, no_appears
-            ):
-                return word
+        """Guess the first word that matches the constraints given by all past guesses.
+
+        Words are checked in alphabetical order with :func:`pyrdle.kernels.first_valid`
+        if :mod:`numba` is installed, or else with :func:`get_valid_indices`. The guess
+        only depends on the configuration and on the game so far, so it's cached
+        across games on the configuration. Many secret words give the same calls for
+        the initial guesses, e.g., when playing all words with :meth:`Controller.play_all`.
+        On a miss, the guess is made with the constraints kept up to date by
+        :meth:`InitialGuesser.guess`, which are the same for the same history.
+        """
+        return self.configuration._memoize(
+            "greedy",
+            (tuple(guesses), tuple(map(bytes, calls))),
+            functools.partial(
+                _guess_greedy,
+                self.configuration,
+                guesses,
+                positions=self.positions,
+                appears=self.appears,
+                no_appears=self.no_appears,
+            ),
+            maxsize=2**20,
+        )
+
+
+def _guess_greedy(
+    configuration: Configuration,
+    guesses: Sequence[str],
+    *,
+    positions: dict[int, str],
+    appears: set[str],
+    no_appears: set[str],
+) -> str:
+    guessed = [configuration.words_index[guess] for guess in guesses]
+    if HAS_NUMBA:
+        index = first_valid(
+            configuration.words_array,
+            configuration.masks,
+            np.array(guessed, dtype=np.int64),
+            np.array(list(positions), dtype=np.int64),
+            np.array([configuration.codes[char] for char in positions.values()], dtype=np.uint8),
+            np.uint64(configuration.get_mask(appears)),
+            np.uint64(configuration.get_mask(no_appears)),
+        )
+    else:
+        indices = get_valid_indices(configuration, positions, appears, no_appears)
+        indices = indices[~np.isin(indices, guessed)]
+        index = indices[0] if len(indices) else -1
+    if index < 0:
         raise ValueError("could not make a guess")
+    return configuration.words_list[index]
 
 
 class CachedGreedyInitialGuesser(InitialGuesser):
     """Guess the initial guesses then use process of elimination to make new guesses."""
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+    def reset(self) -> None:
+        """Reset the player, including the remaining words."""
+        super().reset()
         self.remaining = set(self.configuration.words)
-        self.positions = {}
-        self.appears = set()
-        self.no_appears = set()
-
-    def update_constraints(self, guess: str, call: Sequence[Call]) -> None:
-        _update_constraints(
-            positions=self.positions,
-            appears=self.appears,
-            no_appears=self.no_appears,
-            guess=guess,
-            call=call,
-        )
-
-    def pre_late_game_hook(self, guesses: list[str], calls: list[Sequence[Call]]):
-        for guess, call in zip(guesses, calls):
-            self.update_constraints(guess=guess, call=call)
 
     def guess_late_game(self, guesses: list[str], calls: list[Sequence[Call]]) -> str:
-        """Guess the first word that matches the constraints given by all past guesses."""
-        self.update_constraints(guess=guesses[-1], call=calls[-1])
-        self.remaining = set(
-            word
-            for word in self.remaining
-            if valid_under_constraints(
-                word,
+        """Guess the first word that matches the constraints given by all past guesses.
+
+        The remaining words only depend on the game so far, since they're filtered
+        from the ones left after the last guess, so the guess and the remaining words
+        are cached across games on the configuration.
+        """
+        guess, self.remaining = self.configuration._memoize(
+            "cached_greedy",
+            (tuple(guesses), tuple(map(bytes, calls))),
+            self._calculate_late_game,
+            maxsize=2**16,
+        )
+        return guess
+
+    def _calculate_late_game(self) -> tuple[str, set[str]]:
+        # The remaining words are shared by the games with the same history, so
+        # they're replaced rather than changed in place once they're cached
+        remaining = set(
+            _iter_valid(
+                self.configuration,
+                self.remaining,
                 positions=self.positions,
                 appears=self.appears,
                 no_appears=self.no_appears,
             )
         )
-        return self.remaining.pop()
+        guess = remaining.pop()
+        return guess, remaining
 
 
 class MaxEntropyInitialGuesser(InitialGuesser):
     """Guess the initial guesses then use process of elimination to make new guesses."""
 
-    def __init__(self, **kwargs):
-        super().__init__(**kwargs)
+    def reset(self) -> None:
+        """Reset the player, including the remaining words."""
+        super().reset()
         self.remaining = dict(self.configuration.scores)
-        self.positions = {}
-        self.appears = set()
-        self.no_appears = set()
-
-    def update_constraints(self, guess: str, call: Sequence[Call]) -> None:
-        _update_constraints(
-            positions=self.positions,
-            appears=self.appears,
-            no_appears=self.no_appears,
-            guess=guess,
-            call=call,
-        )
-
-    def pre_late_game_hook(self, guesses: list[str], calls: list[Sequence[Call]]):
-        for guess, call in zip(guesses, calls):
-            self.update_constraints(guess=guess, call=call)
 
     def guess_late_game(self, guesses: list[str], calls: list[Sequence[Call]]) -> str:
         """Guess the first word that matches the constraints given by all past guesses."""
-        self.update_constraints(guess=guesses[-1], call=calls[-1])
         self.remaining = {
-            word: score
-            for word, score in self.remaining.items()
-            if valid_under_constraints(
-                word,
+            word: self.remaining[word]
+            for word in _iter_valid(
+                self.configuration,
+                self.remaining,
                 positions=self.positions,
                 appears=self.appears,
                 no_appears=self.no_appears,
@@ -320,9 +794,106 @@ class MaxEntropyInitialGuesser(InitialGuesser):
     def pick(self):
         return max(self.remaining, key=self.remaining.get)
 
+
+class EntropyPlayer(Player):
+    """Guess the word that gives the most information about which remaining word is the secret."""
+
+    def guess(self, guesses: list[str], calls: list[Sequence[Call]]) -> str:
+        """Guess the word whose calls split the remaining words most evenly.
+
+        The remaining words are the ones that would have given the same calls
+        as the secret word for all past guesses. Each word is scored by the
+        entropy of the distribution of its calls over the remaining words, which
+        are looked up in :meth:`Configuration.get_responses`. Ties are broken in
+        favor of remaining words, since they might win.
+
+        The guess only depends on the configuration and on the game so far, so it's
+        cached across games on the configuration. The opening guess is the same every
+        game, so it's also cached on disk by :func:`_get_entropy_opening`.
+        """
+        key = (tuple(guesses), tuple(map(bytes, calls)))
+        if guesses:
+            calculate = functools.partial(_guess_entropy, self.configuration, *key)
+        else:
+            calculate = functools.partial(_get_entropy_opening, self.configuration)
+        return self.configuration._memoize("entropy", key, calculate, maxsize=2**16)
+
+    def prepare(self) -> None:
+        """Calculate or load the responses and the opening guess, so they're cached on disk."""
+        self.configuration.get_responses()
+        self.guess([], [])
+
+
+def _guess_entropy(
+    configuration: Configuration,
+    guesses: tuple[str, ...],
+    calls: tuple[bytes, ...],
+) -> str:
+    responses = configuration.get_responses()
+    remaining = np.ones(len(configuration.words_list), dtype=bool)
+    for guess, call in zip(guesses, calls):
+        remaining &= responses[configuration.words_index[guess]] == encode_calls(call)
+    indices = np.flatnonzero(remaining)
+    if len(indices) == 0:
+        raise ValueError("could not make a guess")
+    # With one or two words left, guessing one of them is always best
+    if len(indices) <= 2:
+        return configuration.words_list[indices[0]]
+    entropies = _calculate_entropies(responses, indices, n_codes=3**configuration.length)
+    return configuration.words_list[np.lexsort((~remaining, -entropies))[0]]
+
+
+def _get_entropy_opening(configuration: Configuration) -> str:
+    """Get the opening guess of the :class:`EntropyPlayer`, cached on disk.
+
+    The cache is keyed by a hash of the words, so it's only valid for the
+    dictionary it was calculated with. It's replaced atomically, and one that
+    can't be read is calculated again.
+    """
+    path = pystow.join(
+        "wordle",
+        name=f"opening_entropy_v{_RESPONSES_VERSION}_{configuration.language}_{configuration.length}.json",
+    )
+    fingerprint = hashlib.blake2b("\n".join(configuration.words_list).encode("utf-8")).hexdigest()
+    try:
+        cached = json.loads(path.read_text())
+        if cached["fingerprint"] == fingerprint and cached["guess"] in configuration.words_index:
+            return cached["guess"]
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # A missing or corrupt cache is a miss
+    guess = _guess_entropy(configuration, (), ())
+    content = json.dumps({"fingerprint": fingerprint, "guess": guess}).encode("utf-8")
+    _write_atomically(path, lambda file: file.write(content))
+    return guess
+
+
+def _calculate_entropies(
+    responses: np.ndarray, indices: np.ndarray, n_codes: int, block_size: int = 256
+) -> np.ndarray:
+    """Calculate the entropy in bits of the distribution of calls for each guess over the given secret words."""
+    rv = np.empty(len(responses))
+    # Shift each row's codes so a single bincount counts every row separately
+    offsets = np.arange(block_size)[:, None] * n_codes
+    for start in range(0, len(responses), block_size):
+        stop = start + block_size
+        block = responses[start:stop, indices]
+        n_rows = len(block)
+        counts = np.bincount(
+            (block + offsets[:n_rows]).ravel(), minlength=n_rows * n_codes
+        ).reshape(n_rows, n_codes)
+        log_counts = np.log2(counts, out=np.zeros(counts.shape), where=counts > 0)
+        rv[start:stop] = np.log2(len(indices)) - (counts * log_counts).sum(axis=1) / len(indices)
+    return rv
+
+
 player_resolver = Resolver.from_subclasses(base=Player, skip={InitialGuesser})
 
 
+@lru_cache(maxsize=None)
+def _lookup_player_cls(player_cls: Hint[Player]) -> Type[Player]:
+    return player_resolver.lookup(player_cls)
+
+
 class Controller:
     """A controller for running the game."""
 
@@ -330,6 +901,7 @@ class Controller:
     game: Game
     player_cls: Type[Player]
     player_kwargs: dict[str, Any]
+    _player: Optional[Player]
 
     def __init__(
         self,
@@ -344,28 +916,136 @@ class Controller:
             of length=5, height=6.
         """
         self.configuration = Configuration() if configuration is None else configuration
-        self.player_cls = player_resolver.lookup(player_cls)
+        self.player_cls = _lookup_player_cls(player_cls)
         self.player_kwargs = player_kwargs or {}
-
-    def play(self, word: Optional[str] = None, verbose: bool = False) -> Game:
-        """Play a full game."""
+        self._player = None
+
+    def make_player(self) -> Player:
+        """Instantiate a player."""
+        return self.player_cls(configuration=self.configuration, **self.player_kwargs)
+
+    def get_player(self) -> Player:
+        """Get the player that's reused for each game, instantiating it the first time."""
+        if self._player is None:
+            self._player = self.make_player()
+        return self._player
+
+    def play(
+        self, word: Optional[str] = None, verbose: bool = False, player: Optional[Player] = None
+    ) -> Game:
+        """Play a full game.
+
+        :param word: The secret word. If not given, chooses one randomly.
+        :param verbose: Should the game be printed as it's played?
+        :param player: A player to reuse, which is reset before the game. If not
+            given, uses the one from :meth:`get_player`.
+        :returns: The finished game
+        """
         game = Game(configuration=self.configuration, word=word)
-        player = player_resolver.make(
-            self.player_cls, self.player_kwargs, configuration=self.configuration
-        )
+        if player is None:
+            player = self.get_player()
+        player.reset()
         game.play(player, verbose=verbose)
         return game
 
-    def play_all(self):
-        """Play a game on all words."""
-        counter = Counter()
-        for word in tqdm(self.configuration.words, leave=False, unit_scale=True, unit="word"):
-            game = self.play(word)
-            if game.state():
-                counter[len(game.guesses)] += 1
-            else:
-                counter["Failure"] += 1
-        return counter
+    def play_all(self, use_tqdm: bool = True, max_workers: Optional[int] = 1) -> np.ndarray:
+        """Play a game on all words.
+
+        :param use_tqdm: Should a progress bar be shown?
+        :param max_workers: The number of processes used to play the games. Defaults
+            to playing all games in this process. If None, uses the number of processors.
+        :returns: A histogram of length ``height + 1`` whose i-th entry is the number
+            of games won with i guesses. The 0-th entry is the number of games lost.
+        """
+        return self.play_words(
+            self.configuration.words_list, use_tqdm=use_tqdm, max_workers=max_workers
+        )
+
+    def play_random(
+        self, k: int, use_tqdm: bool = True, max_workers: Optional[int] = 1
+    ) -> np.ndarray:
+        """Play games on randomly chosen words, e.g., to estimate how well a player does.
+
+        :param k: The number of games. All secret words are chosen up front with
+            :meth:`Configuration.choice_many`.
+        :param use_tqdm: Should a progress bar be shown?
+        :param max_workers: The number of processes used to play the games.
+        :returns: A histogram like the one from :meth:`play_all`
+        """
+        words_list = self.configuration.words_list
+        words = [words_list[i] for i in self.configuration.choice_many(k).tolist()]
+        return self.play_words(words, use_tqdm=use_tqdm, max_workers=max_workers)
+
+    def play_words(
+        self, words: Sequence[str], use_tqdm: bool = True, max_workers: Optional[int] = 1
+    ) -> np.ndarray:
+        """Play a game on each of the given words.
+
+        :param words: The secret words
+        :param use_tqdm: Should a progress bar be shown?
+        :param max_workers: The number of processes used to play the games.
+        :returns: A histogram like the one from :meth:`play_all`
+        """
+        return np.bincount(
+            self.evaluate(words, use_tqdm=use_tqdm, max_workers=max_workers),
+            minlength=self.configuration.height + 1,
+        )
+
+    def evaluate(
+        self, words: Sequence[str], use_tqdm: bool = True, max_workers: Optional[int] = 1
+    ) -> np.ndarray:
+        """Play a game on each of the given words and get the result of each.
+
+        :param words: The secret words
+        :param use_tqdm: Should a progress bar be shown?
+        :param max_workers: The number of processes used to play the games. Each
+            gets a copy of the controller once when it starts, rather than with
+            each game.
+        :returns: An array with the number of guesses used to win the game on each
+            word, or 0 if it was lost
+        """
+        if max_workers == 1:
+            return self._collect(map(self._play_result, words), len(words), use_tqdm=use_tqdm)
+        # Make the player's shared caches once, rather than in each worker
+        self.get_player().prepare()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=get_mp_context(),
+            initializer=_initialize_worker,
+            initargs=(self,),
+        ) as executor:
+            return self._collect(
+                executor.map(_play_worker, words, chunksize=64), len(words), use_tqdm=use_tqdm
+            )
+
+    @staticmethod
+    def _collect(results: Iterable[int], n: int, use_tqdm: bool) -> np.ndarray:
+        if use_tqdm:
+            results = tqdm(results, total=n, leave=False, unit_scale=True, unit="word")
+        return np.fromiter(results, dtype=np.int64, count=n)
+
+    def _play_result(self, word: str) -> int:
+        game = self.play(word)
+        if game.state():
+            return len(game.guesses)
+        return 0
+
+
+#: The controller shared by each worker process, set by :func:`_initialize_worker`
+_controller: Optional[Controller] = None
+
+
+def _initialize_worker(controller: Controller) -> None:
+    global _controller
+    controller.configuration.seed()
+    _controller = controller
+
+
+def _play_worker(word: str) -> int:
+    """Play a game on the given word in a worker process."""
+    if _controller is None:
+        raise RuntimeError("worker was not initialized")
+    return _controller._play_result(word)
 
 
 def main(length: int = 5, height: int = 6):
@@ -397,13 +1077,13 @@ def main(length: int = 5, height: int = 6):
         controller = Controller(
             player_cls=player_cls, player_kwargs=player_kwargs, configuration=configuration
         )
-        counter = controller.play_all()
+        histogram = controller.play_all(max_workers=None)
         rows.append(
             (
                 player_cls,
                 player_kwargs,
-                configuration.success(counter),
-                configuration.speed(counter),
+                configuration.success(histogram),
+                configuration.speed(histogram),
             )
         )
     print(tabulate(rows, headers=["cls", "kwargs", "success", "speed"], tablefmt="github"))